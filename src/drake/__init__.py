@@ -8,8 +8,14 @@
 
 import os as _OS
 import atexit
+import concurrent.futures
 import contextlib
 import drake.debug
+import errno
+try:
+  import fcntl
+except ImportError:
+  fcntl = None
 import hashlib
 import inspect
 import itertools
@@ -57,6 +63,7 @@ def duration(start, stop = None):
 PRETTY = 'DRAKE_PRETTY' in os.environ
 PROFILE = 'DRAKE_PROFILE' in os.environ
 
+
 class Drake:
 
   current = None
@@ -118,6 +125,12 @@ class Drake:
   def nodes(self):
     return self.__nodes
 
+  @property
+  def roots(self):
+    '''Nodes no builder consumes, in registration order — the
+    default build targets.'''
+    return list(self.__roots)
+
   def recurse(self, path):
     class Recurser:
       def __init__(self, drake):
@@ -147,6 +160,7 @@ class Drake:
                adjust_mtime = None,
                adjust_mtime_future = None,
                adjust_mtime_second = None,
+               hasty = None,
   ):
     if root is None:
       root = drake.Path('.')
@@ -154,6 +168,7 @@ class Drake:
     self.__jobs_lock = None
     self.__kill_builders_on_failure = kill_builders_on_failure
     self.__nodes = {}
+    self.__roots = {}
     self.__prefix = drake.Path('.')
     self.__scheduler = Scheduler(policy = sched.DepthFirst())
     self.__source = drake.Path(root)
@@ -165,14 +180,14 @@ class Drake:
       'ADJUST_MTIME_FUTURE', False, adjust_mtime_future)
     self.__adjust_mtime_second = self.__option(
       'ADJUST_MTIME_SECOND', False, adjust_mtime_second)
+    self.__hasty = self.__option(
+      'HASTY', False, hasty)
     # Load the root drakefile
     self.__globals = {}
     path = str(self.path_source / 'drakefile')
     if _OS.path.exists(path):
-      with open(path, 'r') as drakefile:
-        with self:
-          exec(compile(drakefile.read(), path, 'exec'),
-               self.__globals)
+      with self:
+        exec(_drakefile_code(path), self.__globals)
       self.__module = _Module(self.__globals)
       self.__configure = self.__module.configure
     else:
@@ -189,6 +204,12 @@ class Drake:
   def use_mtime(self):
     return self.__use_mtime
 
+  @property
+  def hasty(self):
+    '''Whether to consider present targets up to date without
+    hashing, leaving freshness to the user.'''
+    return self.__hasty
+
   @property
   def adjust_mtime(self):
     return self.__adjust_mtime
@@ -227,26 +248,28 @@ class Drake:
       g = self.__globals
       module = self.__module
       configure = self.__configure
-      # Parse arguments
+      # Parse arguments. Options map to their callback and arity, so
+      # dispatching is a single dict probe per token instead of
+      # introspecting the callback signature.
       options = {
-        '--jobs': lambda j: self.jobs_set(j),
-        '-j'    : lambda j : self.jobs_set(j),
-        '--help': help,
-        '-h'    : help,
-        '--complete-modes': complete_modes,
-        '--complete-options': complete_options,
-        '--complete-nodes': complete_nodes,
+        '--jobs': (self.jobs_set, 1),
+        '-j'    : (self.jobs_set, 1),
+        '--help': (help, 0),
+        '-h'    : (help, 0),
+        '--complete-modes': (complete_modes, 0),
+        '--complete-options': (complete_options, 0),
+        '--complete-nodes': (complete_nodes, 0),
       }
-      arguments_re = re.compile('--(\\w+)=(.*)')
       specs = inspect.getfullargspec(configure)
       callbacks = []
+      rest = []
       i = 0
       args = sys.argv[1:]
       while i < len(args):
-        match = arguments_re.match(args[i])
-        if match:
-          name = match.group(1)
-          value = match.group(2)
+        arg = args[i]
+        i += 1
+        if arg.startswith('--') and '=' in arg:
+          name, _, value = arg[2:].partition('=')
           if name in specs.args:
             if name in specs.annotations:
               t = specs.annotations[name]
@@ -259,20 +282,18 @@ class Drake:
                   raise Exception('invalid value for '
                                   'boolean option %s: %s' % (name, value))
             kwcfg[name] = value
-            del args[i]
-            continue
-        elif args[i] in options:
-          opt = args[i]
-          del args[i]
-          opt_args = []
-          for a in inspect.getfullargspec(options[opt]).args:
-            opt_args.append(args[i])
-            del args[i]
-          cb = options[opt](*opt_args)
+          else:
+            rest.append(arg)
+          continue
+        if arg in options:
+          callback, arity = options[arg]
+          cb = callback(*args[i:i + arity])
+          i += arity
           if cb is not None:
             callbacks.append(cb)
           continue
-        i += 1
+        rest.append(arg)
+      args = rest
       # Configure
       with self:
         configure(*cfg, **kwcfg)
@@ -285,15 +306,14 @@ class Drake:
         while True:
           if i < len(args):
             arg = args[i]
-            if arg[0:2] == '--':
+            if arg.startswith('--'):
               arg = arg[2:]
-              if arg in _MODES:
-                mode = _MODES[arg]
-              else:
+              mode = _MODES.get(arg)
+              if mode is None:
                 raise Exception('Unknown option: %s.' % arg)
               i += 1
           nodes = []
-          while i < len(args) and args[i][0:2] != '--':
+          while i < len(args) and not args[i].startswith('--'):
             nodes.append(node(args[i]))
             i += 1
           if not nodes:
@@ -437,6 +457,10 @@ class Path:
   """Node names, similar to a filesystem path."""
 
   cache = {}
+  # Existence checks, cached per path string. Entries are dropped (or
+  # the cache cleared) whenever drake itself creates or removes files;
+  # builders invalidate their targets after execution.
+  exists_cache = {}
 
   def __new__(self,
               path,
@@ -491,9 +515,8 @@ class Path:
 
   def __parse(path):
     if Path.windows:
-      volume = re.compile('^([a-zA-Z]):').match(path)
-      if volume:
-        volume = volume.group(1)
+      if len(path) >= 2 and path[1] == ':' and path[0].isalpha():
+        volume = path[0]
         path = path[2:]
       else:
         volume = ''
@@ -508,7 +531,7 @@ class Path:
       else:
         absolute = False
         virtual = False
-      path = path = tuple(re.split(r'/|\\', path))
+      path = tuple(path.replace('\\', '/').split('/'))
     else:
       volume = None
       if path[:2] == '//':
@@ -630,25 +653,25 @@ class Path:
           ...
       Exception: Path does not exist: /tmp/.drake.foo
       """
+      path = str(self)
+      # Removing a directory invalidates any path below it; play it
+      # safe and drop the whole existence cache.
+      Path.exists_cache.clear()
       try:
-          _OS.remove(str(self))
+          _OS.remove(path)
       except OSError as e:
         import sys
         if e.errno == 2:
           if err:
-            raise Exception('Path does not exist: %s' % str(self))
+            raise Exception('Path does not exist: %s' % path)
         # OS X throws an errno 1 when trying to remove a directory.
         elif e.errno == 21 or (sys.platform == 'darwin' and e.errno == 1):
-          shutil.rmtree(str(self))
+          shutil.rmtree(path)
         else:
           raise
 
   def __extension_get(self):
-      parts = self.__path[-1].split('.')
-      if len(parts) > 1:
-          return '.'.join(parts[1:])
-      else:
-          return ''
+      return self.__path[-1].partition('.')[2]
 
   def with_extension(self, value):
     '''The path with a different extension.
@@ -662,24 +685,17 @@ class Path:
     >>> p.with_extension('txt')
     Path("foo.txt")
     '''
-    parts = self.__path[-1].split('.')
-    if len(parts) > 1:
-      if value == '':
-        parts = [parts[0]]
-      else:
-        parts = [parts[0], value]
-      return Path(self.__path[:-1] + ('.'.join(parts),),
-                  absolute = self.__absolute,
-                  virtual = self.__virtual,
-                  volume = self.__volume)
-    else:
-      if value != '':
-        return Path(self.__path[:-1] + ('%s.%s' % (parts[0], value),),
-                    absolute = self.__absolute,
-                    virtual = self.__virtual,
-                    volume = self.__volume)
-      else:
+    stem, dot, ext = self.__path[-1].partition('.')
+    if value == '':
+      if not dot:
         return self
+      last = stem
+    else:
+      last = '%s.%s' % (stem, value)
+    return Path(self.__path[:-1] + (last,),
+                absolute = self.__absolute,
+                virtual = self.__virtual,
+                volume = self.__volume)
 
   extension = property(
       fget = __extension_get,
@@ -713,7 +729,7 @@ class Path:
       >>> p.without_last_extension()
       Path("foo")
       """
-      ext = '.'.join(self.extension.split('.')[:-1])
+      ext = self.extension.rpartition('.')[0]
       return self.with_extension(ext)
 
   def __str__(self):
@@ -768,9 +784,12 @@ class Path:
       >>> p.exists()
       False
       """
-      if _OS.path.islink(str(self)):
-          return True
-      return _OS.path.exists(str(self))
+      path = str(self)
+      res = Path.exists_cache.get(path)
+      if res is None:
+        res = _OS.path.islink(path) or _OS.path.exists(path)
+        Path.exists_cache[path] = res
+      return res
 
   @property
   def executable(self):
@@ -856,9 +875,11 @@ class Path:
       parent = self.dirname()
       if parent is not Path.dot:
         parent.mkpath()
-      if not _OS.path.exists(str(self)):
-        with open(str(self), 'w') as f:
-          pass
+      path = str(self)
+      # O_CREAT without O_TRUNC: creates the file atomically and
+      # leaves an existing one untouched, saving the exists probe.
+      _OS.close(_OS.open(path, _OS.O_WRONLY | _OS.O_CREAT, 0o666))
+      Path.exists_cache[path] = True
 
   def mkpath(self):
       """Create the designated directory.
@@ -871,8 +892,9 @@ class Path:
       >>> p.exists()
       True
       """
-      if not _OS.path.exists(str(self)):
-          _OS.makedirs(str(self))
+      path = str(self)
+      _OS.makedirs(path, exist_ok = True)
+      Path.exists_cache[path] = True
 
   def __eq__(self, rhs):
       """Whether self equals rhs.
@@ -971,14 +993,16 @@ class Path:
       """
       rhs = drake.Path(rhs).canonize().__path
       path = self.__path
-      while len(rhs) and len(path) and path[0] == rhs[0]:
-        rhs = rhs[1:]
-        path = path[1:]
+      common = 0
+      bound = min(len(rhs), len(path))
+      while common < bound and path[common] == rhs[common]:
+        common += 1
+      rhs = rhs[common:]
       if not force and len(rhs) > 0:
         return self
       # FIXME: naive if rhs contains some '..'
       assert '..' not in rhs
-      path = ('..',) * len(rhs) + path
+      path = ('..',) * len(rhs) + path[common:]
       if not path:
         path = ('.',)
       return drake.Path(path,
@@ -1154,7 +1178,12 @@ class DepFile:
       if self.__invalid:
         return False
       res = True
-      for path, (old_hash, data) in self.__hashes.items():
+      entries = []
+      use_mtime = Drake.current.use_mtime
+      for path, entry in self.__hashes.items():
+        old_hash = entry[0]
+        # Depfiles written before the stat shortcut hold 2-tuples.
+        old_stat = entry[2] if len(entry) > 2 else None
         if old_hash is None:
           continue
         # FIXME: needed ?
@@ -1165,7 +1194,7 @@ class DepFile:
         if n.missing():
           explain(self.__builder, '%s disappeared' % path)
           return False
-        if Drake.current.use_mtime and isinstance(n, Node):
+        if use_mtime and isinstance(n, Node):
           try:
             mtime = n.mtime
           except NotImplementedError:
@@ -1181,9 +1210,33 @@ class DepFile:
               '%s: %s is more recent than %s (%s > %s)' % (
                 self.__builder, n.path(), oldest_target,
                 mtime, oldest_mtime))
+          if old_stat is not None and not n.dependencies:
+            # Size and mtime recorded when the hash was stored: if
+            # neither moved, trust them and skip rehashing, the way
+            # ccache does.
+            try:
+              st = _OS.lstat(str(n.path()))
+            except OSError:
+              st = None
+            if st is not None \
+               and (st.st_size, st.st_mtime_ns) == old_stat:
+              continue
+        entries.append((path, n, old_hash))
+      def hash_or_none(n):
         try:
-          h = n.hash()
+          return n.hash()
         except Exception:
+          return None
+      if len(entries) > 1 and Drake.current.jobs > 1:
+        # Hashing releases the GIL, so hash dependencies in parallel
+        # and overlap both the I/O and the digest computations.
+        with concurrent.futures.ThreadPoolExecutor(
+            max_workers = Drake.current.jobs) as ex:
+          hashes = list(ex.map(lambda e: hash_or_none(e[1]), entries))
+      else:
+        hashes = [hash_or_none(n) for path, n, old_hash in entries]
+      for (path, n, old_hash), h in zip(entries, hashes):
+        if h is None:
           explain(self.__builder, '%s cannot be hashed' % path)
           return False
         if h != old_hash:
@@ -1193,9 +1246,40 @@ class DepFile:
 
     def update(self):
       """Rehash all files and write to the store file."""
+      # Warm the per-node hash caches in parallel first — hashing
+      # releases the GIL, as in up_to_date. Errors are left for the
+      # serial pass below so they surface in order.
+      pending = list(dict.fromkeys(
+        node for node, source in self.__files
+        if source and node._BaseNode__hash is None))
+      if len(pending) > 1 and Drake.current.jobs > 1:
+        def hash_quiet(n):
+          try:
+            n.hash()
+          except Exception:
+            pass
+        with concurrent.futures.ThreadPoolExecutor(
+            max_workers = Drake.current.jobs) as ex:
+          list(ex.map(hash_quiet, pending))
+      def entry(node, source):
+        if not source:
+          return (None, node.drake_type())
+        # Stat before hashing: a write landing in between makes the
+        # stored stat stale, which errs on the rehash side. Only
+        # regular files without dependencies qualify — the hash of a
+        # node folds in its dependencies, which its own stat cannot
+        # witness.
+        st = None
+        if isinstance(node, Node) and not node.dependencies:
+          try:
+            lst = _OS.lstat(str(node.path()))
+            if stat.S_ISREG(lst.st_mode):
+              st = (lst.st_size, lst.st_mtime_ns)
+          except OSError:
+            pass
+        return (node.hash(), node.drake_type(), st)
       self.__hashes = dict(
-        (node.name_absolute(), (node.hash() if source else None,
-                                node.drake_type()))
+        (node.name_absolute(), entry(node, source))
         for node, source in self.__files)
       self.__dirty = False
       self.save()
@@ -1203,9 +1287,10 @@ class DepFile:
     def save(self):
       content = {'hashes': self.__hashes, 'dirty': self.__dirty}
       with profile_pickling():
-        path = self.path()
-        with open(str(path), 'wb') as f:
+        path = str(self.path())
+        with open(path, 'wb') as f:
           pickle.Pickler(f).dump((0, content))
+        Path.exists_cache[path] = True
 
     def remove(self):
       """Rehash all files and write to the store file."""
@@ -1260,6 +1345,7 @@ class _BaseNodeTypeType(type):
 
         res = type.__call__(c, name, *arg, **kwargs)
         k = '%s.%s' % (res.__module__, res.__name__)
+        res._drake_type = k
         _BaseNodeTypeType.node_types[k] = res
         return res
 
@@ -1302,6 +1388,7 @@ class BaseNode(object, metaclass = _BaseNodeType):
       raise Exception('%s is outside the build directory' % name)
     if Drake.current.nodes.setdefault(self.__name, self) is not self:
       raise NodeRedefinition(self.__name)
+    Drake.current._Drake__roots[self] = None
     self.uid = BaseNode.uid
     BaseNode.uid += 1
     self._builder = None
@@ -1325,15 +1412,7 @@ class BaseNode(object, metaclass = _BaseNodeType):
 
   def dot(self, marks):
     """Print a dot representation of this node build graph."""
-    if self in marks:
-      return True
-    marks[self] = None
-    print('  node_%s [label="%s"]' % (self.uid, self.__name))
-    if self.builder is not None:
-      if self.builder.dot(marks):
-        print('  builder_%s -> node_%s' % (self.builder.uid,
-                                           self.uid))
-    return True
+    return _dot_graph(self, marks)
 
   def compilation_database(self):
     """Print a representation of this node compilation."""
@@ -1363,7 +1442,8 @@ class BaseNode(object, metaclass = _BaseNodeType):
   @classmethod
   def drake_type(self):
       """The qualified name of this type."""
-      return '%s.%s' % (self.__module__, self.__name__)
+      # Computed once at class creation by _BaseNodeTypeType.
+      return self._drake_type
 
   def __str__(self):
       """String representation."""
@@ -1379,9 +1459,8 @@ class BaseNode(object, metaclass = _BaseNodeType):
     Take necessary action to ensure this node is up to date. That
     is, roughly, run this node runner.
     """
-    import sys
     if not _scheduled():
-      Coroutine(self.build, str(self), Drake.current.scheduler)
+      Coroutine(self.build, self, Drake.current.scheduler)
       Drake.current.scheduler.run()
     else:
       with sched.logger.log(
@@ -1392,7 +1471,7 @@ class BaseNode(object, metaclass = _BaseNodeType):
         with sched.Scope() as scope:
           for dep in self.dependencies:
             if not dep.skippable():
-              scope.run(dep.build, str(dep))
+              scope.run(dep.build, dep)
         self.polish()
 
   def _build(self):
@@ -1514,22 +1593,34 @@ class BaseNode(object, metaclass = _BaseNodeType):
     """Digest of the file as a string."""
 
     def _hash_file(hasher, path):
-      if _OS.path.isdir(str(path)):
-        for sub_path in _OS.listdir(str(path)):
-          _hash_file(hasher, _OS.path.join(str(path), str(sub_path)))
-      elif _OS.path.islink(str(path)):
-        hasher.update(_OS.readlink(str(path)).encode('utf-8'))
+      path = str(path)
+      if _OS.path.isdir(path):
+        for sub_path in _OS.listdir(path):
+          _hash_file(hasher, _OS.path.join(path, str(sub_path)))
+      elif _OS.path.islink(path):
+        hasher.update(_OS.readlink(path).encode('utf-8'))
       else:
-        with open(str(path), 'rb') as f:
-          while True:
-            chunk = f.read(8192)
-            if not chunk:
-              break
-            hasher.update(chunk)
+        with open(path, 'rb') as f:
+          if hasattr(hashlib, 'file_digest'):
+            # Feed the file to the hasher with zero-copy chunked
+            # reads, all in C.
+            hashlib.file_digest(f, lambda: hasher)
+          else:
+            # Read into one preallocated buffer so the loop does not
+            # allocate a bytes object per chunk.
+            buffer = bytearray(1 << 20)
+            view = memoryview(buffer)
+            while True:
+              read = f.readinto(buffer)
+              if not read:
+                break
+              hasher.update(view[:read])
 
     if self.__hash is None:
       with profile_hashing():
-        hasher = hashlib.sha1()
+        # Change detection does not need a cryptographic hash; blake2b
+        # is the fastest the stdlib offers. Keep sha1's digest width.
+        hasher = hashlib.blake2b(digest_size = 20)
         hashable = (
           dep for dep in chain((self,), self.dependencies)
           if isinstance(dep, Node))
@@ -1600,7 +1691,10 @@ class Node(BaseNode):
         BaseNode.clean(self)
         if self.builder is not None and self.path().exists():
             print('Deleting %s' % self)
-            _OS.remove(str(self.path()))
+            # Go through Path.remove so the existence cache is
+            # invalidated; a later build in the same invocation must
+            # not see the deleted file as present.
+            self.path().remove()
 
   def path(self, absolute = False):
     """Filesystem path to node file, relative to the root of the
@@ -1803,6 +1897,22 @@ def command(cmd, cwd = None, stdout = None, stderr = None, env = None):
     return False
 
 
+def cmd_output(cmd, cwd = None, env = None):
+  """Run the command and return its standard output.
+
+  cmd -- the command, as an argument list.
+  cwd -- the dir to chdir to before.
+
+  The command is executed directly, without a shell.
+  """
+  if cwd is not None:
+    cwd = str(cwd)
+  if env:
+    env = {k: str(v) for k, v in env.items()}
+  return subprocess.check_output(list(map(str, cmd)),
+                                 cwd = cwd, env = env).decode('utf-8')
+
+
 def command_flatten(command, env = None):
   if env:
     env_ = ['%s=%s' % (var, pipes.quote(str(val)))
@@ -2083,50 +2193,62 @@ class Builder:
                          '%s: already built in this run', self)
         return
       try:
-        # The list of static dependencies is now fixed
-        for source in self.__sources.values():
-          self._depfile.register(source)
         # Reload dynamic dependencies
         execute = self.__reload_dyndeps()
-        coroutines_static = []
-        coroutines_dynamic = []
         # FIXME: symetric of can_skip_node: if a node is a
         # plain file and does not exist, err immediately (or
         # execute = True).
-        # Build static dependencies
+        # Build static and dynamic dependencies concurrently in a
+        # single scope, so independent inputs do not wait for the
+        # static ones to all finish first. A failing dynamic
+        # dependency only forces execution, so swallow its exception
+        # in the coroutine rather than letting it terminate the
+        # scope like a static failure does.
+        dynamic_failures = []
         with logger.log('drake.Builder',
                         drake.log.LogLevel.debug,
-                        '%s: build static dependencies', self):
+                        '%s: build dependencies', self):
           run_builders = set()
           with sched.Scope() as scope:
             for node in self.__sources.values():
+              # The list of static dependencies is now fixed.
+              self._depfile.register(node)
               if node.skippable():
                 continue
               if node.builder in run_builders and not node.dependencies:
                 continue
-              scope.run(node.build, str(node))
-        # Build dynamic dependencies
-        with logger.log('drake.Builder',
-                        drake.log.LogLevel.debug,
-                        '%s: build dynamic dependencies', self):
-          run_builders = set()
-          try:
-            with sched.Scope(exception_join = True) as scope:
-              for node in self.__sources_dyn.values():
-                if node.skippable():
-                  continue
-                if node.builder in run_builders and not node.dependencies:
-                  continue
-                scope.run(node.build, str(node))
-          except Exception as e:
-            logger.log(
-              'drake.Builder',
-              drake.log.LogLevel.trace,
-              '%s: error building dynamic dependency: %s', self, e)
-            explain(
-              self,
-              'some dynamic dependency could not be built: %s' % e)
-            execute = True
+              scope.run(node.build, node)
+            for node in self.__sources_dyn.values():
+              if node.skippable():
+                continue
+              if node.builder in run_builders and not node.dependencies:
+                continue
+              def build_dynamic(node = node):
+                try:
+                  node.build()
+                except sched.Terminate:
+                  raise
+                except Exception as e:
+                  logger.log(
+                    'drake.Builder',
+                    drake.log.LogLevel.trace,
+                    '%s: error building dynamic dependency: %s', self, e)
+                  dynamic_failures.append(e)
+              scope.run(build_dynamic, node)
+        if dynamic_failures:
+          explain(
+            self,
+            'some dynamic dependency could not be built: %s'
+            % dynamic_failures[0])
+          execute = True
+        # Load static dependencies. This must happen even when we
+        # already know we will rebuild: _execute marks the depfile
+        # dirty, which saves the loaded hashes back.
+        self._depfile.read()
+        depfile_builder = self.cachedir / _DEPFILE_BUILDER
+        # Decide whether to execute in a single walk, stopping at the
+        # first reason to rebuild so we never stat, hash or unpickle
+        # more than the decision requires.
         # If any non-virtual target is missing, we must rebuild.
         mtime_implemented = True
         oldest_target = None
@@ -2145,15 +2267,19 @@ class Builder:
                   oldest_mtime = mtime
               except NotImplementedError:
                 mtime_implemented = False
-        # Load static dependencies
-        self._depfile.read()
-        if self._depfile._DepFile__invalid:
-          explain(self,
-                  'dependency file %s is invalid' % self._depfile)
-          execute = True
-        if self._depfile.dirty:
-          explain(self, 'previous build failed')
-          execute = True
+        # In hasty mode, present targets are trusted: skip the
+        # depfile and hash bookkeeping and leave freshness to the
+        # user.
+        if not execute and Drake.current.hasty:
+          return
+        if not execute:
+          if self._depfile._DepFile__invalid:
+            explain(self,
+                    'dependency file %s is invalid' % self._depfile)
+            execute = True
+          elif self._depfile.dirty:
+            explain(self, 'previous build failed')
+            execute = True
         # If a new dependency appeared, we must rebuild.
         if not execute:
           for source in self.__sources.values():
@@ -2163,9 +2289,8 @@ class Builder:
               execute = True
               break
         # Check if we are up to date wrt to the builder itself
-        self._builder_hash = self.hash()
-        depfile_builder = self.cachedir / _DEPFILE_BUILDER
         if not execute:
+          self._builder_hash = self.hash()
           if self._builder_hash is not None:
             if depfile_builder.exists():
               try:
@@ -2184,11 +2309,15 @@ class Builder:
               execute = True
         # Check if we are up to date wrt all dependencies
         if not execute:
+          res = True
           for f in chain((self._depfile,), self._depfiles.values()):
-            res = f.up_to_date(
+            r = f.up_to_date(
               oldest_target, oldest_mtime, mtime_implemented)
-            if not res:
+            if not r:
               execute = True
+              break
+            if isinstance(r, float) and (res is True or r > res):
+              res = r
           if Drake.current.adjust_mtime and \
              mtime_implemented and \
              not execute and \
@@ -2254,6 +2383,8 @@ class Builder:
             success = self.execute()
             for dst in self.__targets:
               dst._Node__mtime = None
+              if isinstance(dst, Node):
+                Path.exists_cache.pop(str(dst.path()), None)
             logger.log('drake.Builder',
                        drake.log.LogLevel.trace,
                        '%s: executed', self)
@@ -2299,6 +2430,7 @@ class Builder:
                      self, depfile_builder)
           with open(str(depfile_builder), 'wb') as f:
             pickle.Pickler(f).dump(self._builder_hash)
+          Path.exists_cache[str(depfile_builder)] = True
         # FIXME: BUG: remove dynamic dependencies files
         # that are no longer present, otherwise this will
         # be rebuilt forever.
@@ -2311,12 +2443,18 @@ class Builder:
         self.__executed = True
 
   def __reload_dyndeps(self):
-    cachedir = self.cachedir
-    if _OS.path.exists(str(cachedir)):
-      for f in _OS.listdir(str(cachedir)):
-        if not _OS.path.isfile(str(cachedir / f)):
+    # One scandir replaces listdir plus a stat per entry: the dirent
+    # already tells us which entries are regular files.
+    try:
+      entries = _OS.scandir(str(self.cachedir))
+    except FileNotFoundError:
+      return
+    with entries:
+      for entry in entries:
+        f = entry.name
+        if f in ('drake', 'drake.Builder', 'stdout'):
           continue
-        if f in ['drake', 'drake.Builder', 'stdout']:
+        if not entry.is_file():
           continue
         depfile = self.depfile(f)
         depfile.read()
@@ -2328,9 +2466,9 @@ class Builder:
             'drake.Builder',
             drake.log.LogLevel.dump,
             '%s: consider dependencies file %s', self, f):
-          for path, (hash, data) in depfile.hashes.items():
+          for path, entry in depfile.hashes.items():
             if path not in self.__sources and path not in self.__sources_dyn:
-              node = handler(self, path, self.get_type(data), None)
+              node = handler(self, path, self.get_type(entry[1]), None)
               if node is not None:
                 sched.logger.log(
                   'drake.Builder',
@@ -2358,29 +2496,29 @@ class Builder:
     """Add a static source."""
     self.__sources[src._BaseNode__name] = src
     src.consumers.append(self)
+    Drake.current._Drake__roots.pop(src, None)
 
   def all_srcs(self):
     """All sources, recursively."""
     res = []
-    for src in self.__sources.values() + self.__sources_dyn.values():
-        res.append(src)
-        if src.builder is not None:
-            res += src.builder.all_srcs()
+    seen = set()
+    stack = list(itertools.chain(self.__sources.values(),
+                                 self.__sources_dyn.values()))
+    while stack:
+      src = stack.pop()
+      if src in seen:
+        continue
+      seen.add(src)
+      res.append(src)
+      if src.builder is not None:
+        stack.extend(itertools.chain(
+          src.builder.__sources.values(),
+          src.builder.__sources_dyn.values()))
     return res
 
   def dot(self, marks):
     """Print a dot representation of the build graph."""
-    if self in marks:
-        return True
-    marks[self] = None
-
-    print('  builder_%s [label="%s", shape=rect]' % \
-          (self.uid, self.__class__))
-    for node in itertools.chain(self.__sources.values(),
-                                self.__sources_dyn.values()):
-        if node.dot(marks):
-            print('  node_%s -> builder_%s' % (node.uid, self.uid))
-    return True
+    return _dot_graph(self, marks)
 
   def _run_job(self, job):
     if Drake.current.jobs_lock is not None:
@@ -2406,11 +2544,13 @@ class Builder:
                                 for p in (effective - expected)):
       g = root_path / g
       self.output('Cleanup %s' % g)
-      g = str(g)
-      if _OS.path.isdir(g):
+      if _OS.path.isdir(str(g)):
         shutil.rmtree(str(g))
+        # rmtree bypasses Path.remove; drop the existence cache so
+        # paths below the removed directory are not seen as present.
+        Path.exists_cache.clear()
       else:
-        _OS.remove(g)
+        g.remove()
 
 
 class ShellCommand(Builder):
@@ -2497,10 +2637,15 @@ class Dictionary(VirtualNode):
 
     def hash(self):
         """Hash value."""
-        # FIXME: sha1 of the string repr ain't optimal
-        items = list(self)
-        items.sort()
-        return hashlib.sha1(str(items).encode('utf-8')).hexdigest()
+        # Feed pairs to the hasher incrementally instead of building
+        # and encoding the repr of the whole sorted list.
+        h = hashlib.blake2b(digest_size = 20)
+        for key, value in sorted(self.content.items()):
+          h.update(repr(key).encode('utf-8'))
+          h.update(b'\x00')
+          h.update(repr(value).encode('utf-8'))
+          h.update(b'\x01')
+        return h.hexdigest()
 
     def __iter__(self):
         """Iterate over the (key, value) pairs."""
@@ -2625,6 +2770,24 @@ class Expander(Builder):
       super().__init__(sources + dicts, [target])
       self.__dicts = dicts
       self.matcher = re.compile(matcher)
+      # If the pattern starts with a literal character, any match
+      # must contain it: remember it so execute can skip the regex
+      # pass with a plain substring test when it is absent. A
+      # backslash only escapes a literal when followed by a
+      # non-alphanumeric character; \d, \b and the like denote
+      # classes or anchors, not literals.
+      if matcher.startswith('\\'):
+        anchor = matcher[1:2] if not matcher[1:2].isalnum() else ''
+        follow = matcher[2:3]
+      else:
+        anchor = matcher[:1]
+        follow = matcher[1:2]
+      # A quantifier can make the leading literal optional and an
+      # alternation can bypass it entirely; don't try to parse
+      # escaping around |, just give up on the anchor.
+      if follow in ('?', '*', '{') or '|' in matcher:
+        anchor = ''
+      self.__anchor = anchor if anchor not in '.^$*+?{}[]()|\\' else None
       self.__missing_fatal = missing_fatal
       self.__target = target
 
@@ -2634,22 +2797,31 @@ class Expander(Builder):
     def execute(self):
         """Expand the keys in the content and write to target file."""
         self.output('Expand %s' % (self.__target))
-        vars = {}
-        for d in self.__dicts:
-            vars.update(dict(d))
         content = self.content()
-        for match in self.matcher.finditer(content):
-            key = match.group(1)
-            try:
-                content = content.replace(match.group(0),
-                                          str(vars[key]))
-            except KeyError:
-                if self.__missing_fatal:
-                    print('Missing expansion: %s' % key)
-                    return False
-
-        with open(str(self.__target.path()), 'w') as f:
-            print(content, file = f)
+        # A substring test is a plain memchr scan; only run the
+        # regex engine when the anchor character shows up at all.
+        if self.__anchor is None or self.__anchor in content:
+            vars = {}
+            for d in self.__dicts:
+                vars.update(dict(d))
+            missing = []
+            def expand(match):
+                try:
+                    return str(vars[match.group(1)])
+                except KeyError:
+                    missing.append(match.group(1))
+                    return match.group(0)
+            # Substitute in a single C-level pass instead of one full
+            # content copy per match.
+            content = self.matcher.sub(expand, content)
+            if missing and self.__missing_fatal:
+                print('Missing expansion: %s' % missing[0])
+                return False
+
+        # Encode once and write the result in a single binary write,
+        # keeping the trailing newline print used to add.
+        with open(str(self.__target.path()), 'wb') as f:
+            f.write(content.encode('utf-8') + b'\n')
         return True
 
     def dictionaries(self):
@@ -2781,11 +2953,11 @@ class FunctionExpander(Expander):
     def content(self):
         """The content obtained by mapping the function on the
         dictionaries."""
-        res = ''
+        function = self.__function
+        parts = []
         for d in self.dictionaries():
-            for key, value in d:
-                res += self.__function(key, value)
-        return res
+            parts.extend(function(key, value) for key, value in d)
+        return ''.join(parts)
 
     def function(self):
         """The function."""
@@ -2833,18 +3005,64 @@ def include(path, *args, **kwargs):
       return res
 
 
+_CODE_CACHE = {}
+
+def _drakefile_code(path):
+  """The code object for the drakefile at path, recompiled only when
+  the file changed since it was last compiled."""
+  st = _OS.stat(path)
+  key = (st.st_mtime_ns, st.st_size)
+  cached = _CODE_CACHE.get(path)
+  if cached is not None and cached[0] == key:
+    return cached[1]
+  with open(path, 'rb') as f:
+    code = compile(f.read(), path, 'exec')
+  _CODE_CACHE[path] = (key, code)
+  return code
+
+
 def _raw_include(path, *args, **kwargs):
   g = {
     'drake': drake,
+    '__file__': path,
   }
-  #execfile(path, g)
-  with open(path) as f:
-    exec(compile('__file__ = "%s"\n' % (path) + f.read(), path, 'exec'), g)
+  exec(_drakefile_code(path), g)
   res = _Module(g)
   if 'configure' in res:
     res.configure(*args, **kwargs)
   return res
 
+def _dot_graph(root, marks):
+  """Walk the build graph iteratively from root and print its dot
+  representation in one buffered write."""
+  out = []
+  stack = [root]
+  while stack:
+    item = stack.pop()
+    if item in marks:
+      continue
+    marks[item] = None
+    if isinstance(item, BaseNode):
+      out.append('  node_%s [label="%s"]' % (item.uid,
+                                             item.name_absolute()))
+      if item.builder is not None:
+        out.append('  builder_%s -> node_%s' % (item.builder.uid,
+                                                item.uid))
+        stack.append(item.builder)
+    else:
+      out.append('  builder_%s [label="%s", shape=rect]' % (
+        item.uid, item.__class__))
+      for node in itertools.chain(
+          item._Builder__sources.values(),
+          item._Builder__sources_dyn.values()):
+        out.append('  node_%s -> builder_%s' % (node.uid, item.uid))
+        stack.append(node)
+  if out:
+    out.append('')
+    sys.stdout.write('\n'.join(out))
+  return True
+
+
 def dot(node, *filters):
   # FIXME: coro!
   node.build()
@@ -2899,12 +3117,10 @@ def _register_commands():
       with CWDPrinter():
         try:
           if not len(nodes):
-            nodes = [node for node in Drake.current.nodes.values()
-                     if not len(node.consumers)]
-          coroutines = []
+            nodes = Drake.current.roots
           for node in nodes:
-            coroutines.append(Coroutine(node.build, str(node),
-                                        Drake.current.scheduler))
+            # The coroutine registers itself with the scheduler.
+            Coroutine(node.build, node, Drake.current.scheduler)
           Drake.current.scheduler.run()
         except Builder.Failed as e:
           print('%s: *** %s' % (sys.argv[0], e))
@@ -2947,8 +3163,7 @@ def _register_commands():
     command_add('dot-show', dot_show_cmd)
 
     def makefile(nodes):
-        root_nodes = [node for node in Drake.current.nodes.values()
-                      if not len(node.consumers)]
+        root_nodes = Drake.current.roots
         if not len(nodes):
             nodes = root_nodes
         print('all: %s\n' % ' '.join(map(lambda n: n.makefile_name(),
@@ -3157,16 +3372,67 @@ class Copy(Builder):
       res = self.__post_process(self.__target.path())
     return res
 
+  def __copy_kernel(self, source_path, target_path):
+    '''Copy file contents kernel-side with os.copy_file_range.
+
+    This skips the userspace bounce buffer and reflinks instead of
+    copying on filesystems that support it. False when the platform
+    or the filesystem does not support it, or when we must copy the
+    symlink itself, so the caller falls back to shutil.
+    '''
+    if not hasattr(_OS, 'copy_file_range'):
+      return False
+    if not self.__follow_symlinks and _OS.path.islink(source_path):
+      return False
+    try:
+      with open(source_path, 'rb') as src, open(target_path, 'wb') as dst:
+        if not self.__reflink(src.fileno(), dst.fileno()):
+          while _OS.copy_file_range(src.fileno(), dst.fileno(), 1 << 30):
+            pass
+    except OSError as e:
+      if e.errno in (errno.EXDEV, errno.EINVAL,
+                     errno.ENOSYS, errno.EOPNOTSUPP):
+        return False
+      raise
+    shutil.copystat(source_path, target_path)
+    return True
+
+  # Linux FICLONE: share the source extents with the target.
+  __FICLONE = 0x40049409
+
+  def __reflink(self, src_fd, dst_fd):
+    '''Clone src into dst in constant time on filesystems supporting
+    reflinks. False if unsupported, so the caller copies the bytes.'''
+    if fcntl is None:
+      return False
+    try:
+      fcntl.ioctl(dst_fd, Copy.__FICLONE, src_fd)
+    except OSError:
+      return False
+    return True
+
   def _copy(self):
+    # Run the copy in the thread pool so that with -j > 1 several
+    # copies overlap instead of serializing in the scheduler, while
+    # still counting against the job limit.
+    if Drake.current.jobs_lock is not None:
+      with Drake.current.jobs_lock:
+        return sched.background(self.__copy_local)
+    else:
+      return self.__copy_local()
+
+  def __copy_local(self):
     with WritePermissions(self.__target):
+      source_path = str(self.__source.path())
       target_path = str(self.__target.path())
       # shutil.copy and copy2 fail to overwrite if source is a symlink
-      if _OS.path.islink(str(self.__source.path())) and _OS.path.lexists(target_path):
+      if _OS.path.islink(source_path) and _OS.path.lexists(target_path):
         _OS.remove(target_path)
       try:
-        shutil.copy2(str(self.__source.path()),
-                     str(self.__target.path()),
-                     follow_symlinks = self.__follow_symlinks)
+        if not self.__copy_kernel(source_path, target_path):
+          shutil.copy2(str(self.__source.path()),
+                       str(self.__target.path()),
+                       follow_symlinks = self.__follow_symlinks)
       except PermissionError as e:
         # Landing here means that we didn't have permission to do a copystat as
         # part of the copy2. Fallback to a straight copy with a log.
@@ -3540,6 +3806,14 @@ class Configuration:
 
   def __search(self, what, where, all):
     what = Path(what)
+    where = list(where)
+    if len(where) > 1:
+      # Warm the existence cache with one concurrent pass: stat
+      # releases the GIL and networked filesystems pay a round trip
+      # per probe, so overlap them instead of stalling per root.
+      with concurrent.futures.ThreadPoolExecutor(
+          max_workers = min(8, len(where))) as ex:
+        list(ex.map(lambda root: (root / what).exists(), where))
     res = []
     for root in where:
       path = root / what
@@ -3962,8 +4236,6 @@ class Runner(Builder):
         sys.stdout.buffer.write(b)
 
   def execute(self):
-    import subprocess
-    import time
     def run():
       count = 0
       with open(str(self.__out.path()), 'w') as out, \
@@ -4107,23 +4379,31 @@ class HTTPDownload(Builder):
             break
       if response is None:
         raise Exception('Unable to download %s' % self.__urls)
-      return response.status, response.read()
-    status, content = self._run_job(job)
+      if response.status != 200:
+        return response.status, None
+      # Stream to the destination while hashing so the body is
+      # touched once and never held in memory.
+      digest = hashlib.md5() if self.__fingerprint is not None else None
+      with response, open(str(self.__dest.path()), 'wb') as f:
+        while True:
+          chunk = response.read(1 << 20)
+          if not chunk:
+            break
+          if digest is not None:
+            digest.update(chunk)
+          f.write(chunk)
+      return response.status, \
+        digest.hexdigest() if digest is not None else None
+    status, checksum = self._run_job(job)
     if status != 200:
       print('download failed with status %s' % status,
             file = sys.stderr)
       return False
-    if self.__fingerprint is not None:
-      import hashlib
-      d = hashlib.md5()
-      d.update(content)
-      h = d.hexdigest()
-      if h != self.__fingerprint:
-        print('wrong checksum for %s: %s' % (self.__dest, h),
-              file = sys.stderr)
-        return False
-    with open(str(self.__dest.path()), 'wb') as f:
-      f.write(content)
+    if self.__fingerprint is not None and checksum != self.__fingerprint:
+      print('wrong checksum for %s: %s' % (self.__dest, checksum),
+            file = sys.stderr)
+      self.__dest.path().remove()
+      return False
     return True
 
   def __str__(self):
@@ -4228,8 +4508,23 @@ class TarballExtractor(ArchiveExtractor):
     '''Use the tar(1) binary to extract the tarball.'''
 
     import subprocess
+    path = str(self.tarball.path())
+    cmd = ['tar', '-xf', path, '-C']
+    # Decompression is the bottleneck on big tarballs and gzip/xz
+    # are single-threaded; hand it to a parallel decompressor when
+    # one is installed.
+    program = None
+    if path.endswith(('.tar.gz', '.tgz')):
+      program = shutil.which('pigz')
+    elif path.endswith(('.tar.xz', '.txz')):
+      program = shutil.which('pixz')
+    elif path.endswith('.zst'):
+      program = shutil.which('zstd')
     with self.tmpdir() as tmp:
-      subprocess.check_call(['tar', 'xf', str(self.tarball.path()), '-C', tmp])
+      cmd.append(tmp)
+      if program is not None:
+        cmd += ['--use-compress-program', program]
+      subprocess.check_call(cmd)
       tmp = drake.Path(tmp)
       self.install(tmp)
 
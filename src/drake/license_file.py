@@ -1,6 +1,9 @@
 import drake
 import drake.git
 import os
+import shutil
+
+_DASH_LINE = '-' * 78
 
 class Packager(drake.Builder):
 
@@ -17,32 +20,49 @@ class Packager(drake.Builder):
     licenses = list()
     def traverse(folder, in_dir):
       rel_dir = '%s/%s' % (in_dir, folder) if folder else in_dir
+      # Compose the directory paths once; each file only appends its
+      # own component instead of re-parsing the whole string.
+      base = drake.Path(rel_dir)
+      dir_path = drake.path_source() / self.__context / base
       git = drake.git.Git(rel_dir)
       for f in git.ls_files():
-        path = str(drake.path_source() / self.__context / rel_dir / f)
-        if os.path.isdir(path):
+        if os.path.isdir(str(dir_path / f)):
           traverse(f, rel_dir)
         else:
-          licenses.append(drake.node('%s/%s' % (rel_dir, f)))
+          licenses.append(drake.node(base / f))
     traverse('', license_folder)
     super().__init__(licenses, [out_file])
-    self.__sorted_sources = \
-      list(map(lambda s: str(s), self.sources().values()))
-    self.__sorted_sources.sort(key = lambda s: s.lower())
+    # Precompute per-license paths and pre-encoded header/footer
+    # blobs once, so execute is a bare I/O loop. Sources are nodes;
+    # render each one to its path string exactly once, for both the
+    # sort and the display name.
+    prefix = '%s/%s/' % (self.__context, self.__license_folder)
+    source_root = drake.path_source()
+    sources = sorted((str(s) for s in self.sources().values()),
+                     key = str.casefold)
+    self.__entries = []
+    for license in sources:
+      name = license.replace(prefix, '', 1)
+      self.__entries.append(
+        (str(source_root / license),
+         ('# Begin: %s\n(*%s\n' % (name, _DASH_LINE)).encode('utf-8'),
+         ('\n%s*)\n# End: %s\n\n' % (_DASH_LINE, name)).encode('utf-8')))
 
   def execute(self):
     print('Generating aggregated license file: %s' % self.__target)
-    with open(str(self.__target), 'w', encoding = 'utf-8') as out:
-      for license in self.__sorted_sources:
-        l_name = license.replace(
-          '%s/%s/' % (self.__context, self.__license_folder), '')
-        l_file = str(drake.path_source() / license)
-        Packager.print_entry(out, l_name, l_file)
+    with open(str(self.__target), 'wb', buffering = 1 << 20) as out:
+      for path, header, footer in self.__entries:
+        out.write(header)
+        with open(path, 'rb') as f:
+          shutil.copyfileobj(f, out, 1 << 20)
+        out.write(footer)
     return True
 
   @staticmethod
   def print_entry(out, name, file):
-    out.write('# Begin: %s\n(*%s\n' % (name, 78 * '-'))
-    with open(file, 'r', encoding = 'utf-8') as f:
-      out.write(f.read())
-    out.write('\n%s*)\n# End: %s\n\n' % (78 * '-', name))
+    out.write(('# Begin: %s\n(*%s\n' % (name, _DASH_LINE)).encode('utf-8'))
+    # Stream the license body instead of materializing it as a str:
+    # the bytes go file to file without a decode/encode round trip.
+    with open(file, 'rb') as f:
+      shutil.copyfileobj(f, out, 1 << 20)
+    out.write(('\n%s*)\n# End: %s\n\n' % (_DASH_LINE, name)).encode('utf-8'))
@@ -213,8 +213,9 @@ class Scheduler:
     self.reset()
     Scheduler.__instance = self
     self.__lock = threading.Condition()
+    self.__parked = False
     self.__policy = policy or RoundRobin()
-    self.__scheduled = []
+    self.__scheduled = collections.deque()
 
   def __str__(self):
     return 'Scheduler'
@@ -224,15 +225,19 @@ class Scheduler:
     self.__running = False
     self.__exception = None
     self.__traceback = None
+    self.__woken = None
 
   def running(self):
     return self.__running
 
-  def debug(self, msg):
-    return logger.log('drake.scheduler', drake.log.LogLevel.trace, msg)
+  def debug(self, msg, *args):
+    # Pass format arguments through so the message is only rendered
+    # when the drake.scheduler component is actually enabled.
+    return logger.log('drake.scheduler', drake.log.LogLevel.trace,
+                      msg, *args)
 
   def add(self, coro):
-    self.debug('%s: new coroutine: %s' % (self, coro.name))
+    self.debug('%s: new coroutine: %s', self, coro.name)
     self.__policy.add(coro)
 
   def run(self):
@@ -246,8 +251,8 @@ class Scheduler:
     try:
       while True:
         if self.__exception is not None:
-          self.debug('%s: pending exception %s, dying' % \
-                     (self, self.__exception))
+          self.debug('%s: pending exception %s, dying',
+                     self, self.__exception)
           # FIXME: terminate everyone
           e = self.__exception
           self.__exception = None
@@ -260,18 +265,25 @@ class Scheduler:
             while not self.__policy.busy:
               with self.__lock:
                 if not self.__scheduled:
+                  self.__parked = True
                   self.__lock.wait()
+                  self.__parked = False
                 assert self.__scheduled
-                for f in self.__scheduled:
-                  f()
-                self.__scheduled = []
+                while self.__scheduled:
+                  self.__scheduled.popleft()()
         for coro in self.__policy.round():
           assert coro is not None
           with self.__lock:
-            for f in self.__scheduled:
-              f()
-            self.__scheduled = []
+            while self.__scheduled:
+              self.__scheduled.popleft()()
           self.__step(coro)
+          # Give the last coroutine we just woke up a priority slot:
+          # it most likely waits on what we just produced, so running
+          # it now saves it a full round trip through the policy.
+          woken = self.__woken
+          self.__woken = None
+          if woken is not None and not woken.done and not woken.frozen:
+            self.__step(woken)
     finally:
       Scheduler.__pool.stop()
       Scheduler.__pool = None
@@ -281,32 +293,37 @@ class Scheduler:
     if (coro.done):
       return
     assert not coro.frozen
-    with self.debug('%s: schedule %s' % (self, coro)):
+    with self.debug('%s: schedule %s', self, coro):
       try:
-        with self.debug('%s: step %s' % (self, coro)):
+        with self.debug('%s: step %s', self, coro):
           coro.step()
       except Exception as e:
-        self.debug('%s: %s threw %s' % (self, coro, e))
+        self.debug('%s: %s threw %s', self, coro, e)
         parent = coro._Coroutine__parent
         if parent is None:
           self.__exception = e#.with_traceback(coro._Coroutine__traceback)
       if coro.done:
-        self.debug('%s ended' % coro)
+        self.debug('%s ended', coro)
         self.__policy.remove(coro)
       elif coro.frozen:
-        self.debug('%s froze' % coro)
+        self.debug('%s froze', coro)
         self.__coroutines_frozen.add(coro)
         self.__policy.freeze(coro)
 
   def unfreeze(self, coro):
-    self.debug('%s wakes up' % coro)
+    self.debug('%s wakes up', coro)
     self.__policy.unfreeze(coro)
     self.__coroutines_frozen.remove(coro)
+    if self.__woken is None:
+      self.__woken = coro
 
   def schedule(self, f):
     with self.__lock:
       self.__scheduled.append(f)
-      self.__lock.notify()
+      # Only signal when the scheduler is actually parked waiting for
+      # us; pending actions are picked up by the running loop anyway.
+      if self.__parked:
+        self.__lock.notify()
 
 class Waitable:
   def __init__(self):
@@ -352,7 +369,11 @@ class Coroutine(Waitable):
 
   def __init__(self, routine, name, scheduler = None, parent = None):
     Waitable.__init__(self)
-    self.__coro = greenlet.greenlet(routine)
+    # The greenlet is only created on the first step: on wide graphs
+    # many coroutines sit scheduled but unstarted, and some are
+    # terminated before ever running.
+    self.__coro = None
+    self.__routine = routine
     self.__done = False
     self.__done_hooks = []
     self.__exception = None
@@ -388,7 +409,9 @@ class Coroutine(Waitable):
 
   @property
   def name(self):
-    return self.__name
+    # Names may be passed as any object and are only rendered when a
+    # log line or error message actually needs them.
+    return str(self.__name)
 
   @property
   def frozen(self):
@@ -481,6 +504,8 @@ class Coroutine(Waitable):
     if self.frozen:
       raise CoroutineFrozen()
     self.__started = True
+    if self.__coro is None:
+      self.__coro = greenlet.greenlet(self.__routine)
     self.__coro.parent = greenlet.getcurrent()
     prev = Coroutine.__current
     try:
@@ -638,11 +663,15 @@ class Semaphore(Waitable, Lockable):
     return 'Semaphore %s' % id(self)
 
   def _Waitable__wait(self, coro):
+    # Guard the debug calls: with debugging off, formatting the
+    # message would still cost a string per semaphore acquisition.
     if self.count == 0:
-      drake.debug.debug('%s: wait' % self)
+      if drake.debug._DEBUG:
+        drake.debug.debug('%s: wait' % self)
       return Waitable._Waitable__wait(self, coro)
     else:
-      drake.debug.debug('%s: lock one' % self)
+      if drake.debug._DEBUG:
+        drake.debug.debug('%s: lock one' % self)
       self.__count = self.__count - 1
       return False
 
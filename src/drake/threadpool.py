@@ -6,6 +6,7 @@
 #
 # See the LICENSE file for more information.
 
+import collections
 import sys
 import threading
 
@@ -15,75 +16,48 @@ class ThreadPool:
 
     def __init__(self, pool):
       threading.Thread.__init__(self)
-      self.__cond = threading.Condition()
-      self.__f = None
       self.__pool = pool
-      self.__ready = False
-      self.__stop = False
       self.start()
 
     def run(self):
-      while True:
-        #print('%s: process' % self, file = sys.stderr)
-        with self.__cond:
-          if self.__stop:
-            #print('%s: stop' % self)
-            self.__pool._ThreadPool__threads.remove(self)
-            return
-          if self.__f is None:
-            #print('%s: wait for job' % self, file = sys.stderr)
-            self.__cond.wait()
-          if self.__stop:
-            #print('%s: stop' % self, file = sys.stderr)
-            try:
-              self.__pool._ThreadPool__threads.remove(self)
-            except:
-              # If the thread was starting a job, it was already
-              # removed from the set, but that's OK.
-              pass
-            return
-        #print('%s: run job' % self, file = sys.stderr)
-        self.__f()
-        self.__f = None
-        with self.__pool._ThreadPool__lock:
-          #print('%s: register as available' % self, file = sys.stderr)
-          self.__pool._ThreadPool__running.remove(self)
-          self.__pool._ThreadPool__threads.add(self)
-
-    def wake(self, f):
-      with self.__cond:
-        self.__f = f
-        self.__cond.notify()
-
-    def stop(self):
-      with self.__cond:
-        self.__stop = True
-        self.__cond.notify()
-      self.join()
+      self.__pool._ThreadPool__work()
 
   def __init__(self):
-    self.__threads = set()
-    self.__running = set()
-    self.__lock = threading.Semaphore(1)
     self.__cond = threading.Condition()
+    self.__idle = 0
+    self.__jobs = collections.deque()
+    self.__stop = False
+    self.__threads = set()
 
   def run(self, f):
-    with self.__lock:
-      if self.__threads:
-        thread = iter(self.__threads).__next__()
-        self.__threads.remove(thread)
+    with self.__cond:
+      self.__jobs.append(f)
+      if self.__idle > 0:
+        self.__cond.notify()
       else:
-        thread = ThreadPool.Runner(self)
-      self.__running.add(thread)
-    thread.wake(f)
+        self.__threads.add(ThreadPool.Runner(self))
+
+  def __work(self):
+    while True:
+      with self.__cond:
+        while not self.__jobs:
+          if self.__stop:
+            return
+          self.__idle += 1
+          self.__cond.wait()
+          self.__idle -= 1
+        f = self.__jobs.popleft()
+      f()
 
   def stop(self):
-    threads = set()
-    # Collect the Threads and then stop them. Do not stop the Threads
-    # while holding self.__lock, because Thread.stop joins the thread,
-    # which might require self.__lock to finish, hence a dead-lock.
-    with self.__lock:
-      threads = threads.union(self.__threads)
-      threads = threads.union(self.__running)
+    # Wake everyone with the stop flag set, then join outside of the
+    # lock: a finishing job might need the condition to be free.
+    with self.__cond:
+      self.__stop = True
+      self.__cond.notify_all()
+      threads = set(self.__threads)
     for thread in threads:
-      thread.stop()
+      thread.join()
+    with self.__cond:
+      self.__threads.clear()
+      self.__stop = False